@@ -0,0 +1,98 @@
+"""Incrementally maintained forecast rollups (chain total, StoreType, Assortment)"""
+from datetime import date as date_type
+from typing import Dict, List, Any, Optional, Tuple
+
+DIMENSIONS = ("total", "store_type", "assortment")
+GRANULARITIES = ("day", "week")
+
+
+def week_key(date: str) -> str:
+    """ISO week label for a YYYY-MM-DD date, e.g. 2015-W31 (sorts chronologically)"""
+    iso_year, iso_week, _ = date_type.fromisoformat(date).isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+class ForecastRollup:
+    """Store-level forecasts plus running aggregate cells.
+
+    Each (store, date) prediction contributes to one cell per dimension and
+    granularity. Replacing part of a store's forecast applies only the deltas
+    to the cells it touches, so reads never rescan the stores.
+    """
+
+    def __init__(self, store_metadata: Dict[int, Dict[str, Any]]):
+        self.store_metadata = store_metadata
+        self.forecasts: Dict[int, Dict[str, float]] = {}
+        # Latest refresh inputs per store ({"recent_sales": [...], "promo": {date: 0/1}}),
+        # so later refreshes build on earlier ones
+        self.inputs: Dict[int, Dict[str, Any]] = {}
+        # (dimension, granularity) -> {(group, period): [sales, store_days]}
+        self.cells: Dict[Tuple[str, str], Dict[Tuple[str, str], List[float]]] = {
+            (dimension, granularity): {}
+            for dimension in DIMENSIONS
+            for granularity in GRANULARITIES
+        }
+
+    @property
+    def dates(self) -> List[str]:
+        """Sorted forecast horizon covered by the rollup"""
+        return sorted(period for _, period in self.cells[("total", "day")])
+
+    def _groups(self, store: int) -> Dict[str, str]:
+        metadata = self.store_metadata.get(store, {})
+        return {
+            "total": "all",
+            "store_type": metadata.get("store_type") or "unknown",
+            "assortment": metadata.get("assortment") or "unknown",
+        }
+
+    def _apply(self, groups: Dict[str, str], date: str, sales_delta: float, days_delta: int) -> int:
+        periods = {"day": date, "week": week_key(date)}
+        for (dimension, granularity), cells in self.cells.items():
+            cell = cells.setdefault((groups[dimension], periods[granularity]), [0.0, 0])
+            cell[0] += sales_delta
+            cell[1] += days_delta
+        return len(self.cells)
+
+    def update_store(self, store: int, forecasts: Dict[str, float]) -> int:
+        """Replace a store's forecast for the given dates, returning the number of cell updates"""
+        groups = self._groups(store)
+        current = self.forecasts.setdefault(store, {})
+        cells_updated = 0
+        for date, sales in forecasts.items():
+            previous = current.get(date)
+            if previous is None:
+                cells_updated += self._apply(groups, date, sales, 1)
+            elif sales != previous:
+                cells_updated += self._apply(groups, date, sales - previous, 0)
+            current[date] = sales
+        return cells_updated
+
+    def query(
+        self,
+        dimension: str,
+        granularity: str = "day",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Read aggregate cells for one dimension, optionally limited to a date range"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown group_by '{dimension}', expected one of {', '.join(DIMENSIONS)}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}")
+
+        to_period = week_key if granularity == "week" else (lambda date: date)
+        start = to_period(start_date) if start_date else None
+        end = to_period(end_date) if end_date else None
+
+        results = []
+        for (group, period), (sales, store_days) in sorted(self.cells[(dimension, granularity)].items()):
+            if (start and period < start) or (end and period > end):
+                continue
+            results.append({
+                "group": group,
+                "period": period,
+                "forecasted_sales": sales,
+                "store_days": store_days,
+            })
+        return results
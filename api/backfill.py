@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Resumable historical forecast backfill.
+
+Splits the store x date space into chunks (--chunk-stores stores by
+--chunk-days days), scores them across a process pool with the API's
+feature engineering and model, and writes one CSV per chunk under
+<output-dir>/start_date=YYYY-MM-DD/. Completed chunks are recorded in
+<output-dir>/_checkpoint.json, so rerunning the same command after a kill
+only scores what is left. The checkpoint records the model version, so
+after a model change the run must be started over with --restart, which
+first removes the checkpointed partitions. A new backfill needs an empty
+output directory. Promo, holidays and closed days come from the store
+calendar where it covers the dates; closed days are written as 0.
+
+Usage:
+    python backfill.py --start 2015-08-01 --end 2015-09-17
+    python backfill.py --start 2015-08-01 --end 2015-09-17 --stores 1-100 --workers 4
+    python backfill.py --start 2015-08-01 --end 2015-09-17 --restart   # discard the checkpoint and partitions
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import main
+from store_data import load_store_calendar, load_store_metadata
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+
+def parse_stores(value):
+    """Parse '1-100,205,300-310' into a sorted list of store IDs"""
+    stores = set()
+    for part in value.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            stores.update(range(int(first), int(last) + 1))
+        elif part:
+            stores.add(int(part))
+    return sorted(stores)
+
+
+def make_chunks(stores, dates, chunk_stores, chunk_days):
+    """Chunk IDs and their (stores, dates), in date-then-store order"""
+    chunks = []
+    for d in range(0, len(dates), chunk_days):
+        chunk_dates = dates[d:d + chunk_days]
+        for s in range(0, len(stores), chunk_stores):
+            chunk_store_ids = stores[s:s + chunk_stores]
+            chunk_id = f"start_date={chunk_dates[0]}/stores_{chunk_store_ids[0]:04d}-{chunk_store_ids[-1]:04d}"
+            chunks.append((chunk_id, chunk_store_ids, chunk_dates))
+    return chunks
+
+
+def write_atomic(path, write):
+    """Write through a temporary file so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", newline="") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(output_dir, config, restart):
+    """Completed chunk IDs to skip, starting over only where that is safe.
+
+    A matching checkpoint is resumed. With --restart, the partitions of the
+    checkpointed backfill are removed first. Anything else already in the
+    output directory is never deleted: the run refuses to start instead.
+    """
+    checkpoint_path = output_dir / CHECKPOINT_FILE
+    checkpoint = None
+    if checkpoint_path.exists():
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+    if checkpoint is not None and not restart:
+        changed = sorted(key for key in config if checkpoint["config"].get(key) != config[key])
+        if changed:
+            print(f"{checkpoint_path} was written for a different backfill (changed: {', '.join(changed)}); "
+                  f"use --restart or another --output-dir")
+            sys.exit(1)
+        return set(checkpoint["completed"])
+
+    if checkpoint is not None:
+        removed = clear_partitions(output_dir, checkpoint["config"])
+        checkpoint_path.unlink()
+        print(f"Removed {removed} partition files of the previous backfill in {output_dir}")
+    if any(output_dir.iterdir()):
+        print(f"{output_dir} is not empty and holds no backfill checkpoint; use an empty --output-dir")
+        sys.exit(1)
+    return set()
+
+
+def save_checkpoint(output_dir, config, completed):
+    write_atomic(
+        output_dir / CHECKPOINT_FILE,
+        lambda f: json.dump({"config": config, "completed": sorted(completed)}, f, indent=2)
+    )
+
+
+def chunk_plan(config):
+    """Chunks of a backfill config, as written to its checkpoint"""
+    stores = parse_stores(config["stores"]) if config["stores"] != "all" else sorted(load_store_metadata())
+    dates = main.date_range(config["start"], config["end"])
+    return make_chunks(stores, dates, config["chunk_stores"], config["chunk_days"])
+
+
+def clear_partitions(output_dir, config):
+    """Remove the partition files a checkpointed backfill could have written"""
+    removed = 0
+    for chunk_id, _, _ in chunk_plan(config):
+        path = output_dir / f"{chunk_id}.csv"
+        for candidate in (path, path.with_name(path.name + ".tmp")):
+            if candidate.exists():
+                candidate.unlink()
+                removed += candidate.suffix == ".csv"
+    # Drop partition directories left empty
+    for partition in output_dir.glob("start_date=*"):
+        if partition.is_dir() and not any(partition.iterdir()):
+            partition.rmdir()
+    return removed
+
+
+def init_worker(expected_version):
+    """Load the model and store data once per worker process"""
+    if not main.load_model_and_scaler():
+        raise RuntimeError("Could not load model")
+    if main.model_info["version"] != expected_version:
+        raise RuntimeError("Model files changed after the backfill started")
+    # Scoring needs the calendar and metadata, not the seeded forecast rollups
+    main.store_metadata = load_store_metadata()
+    main.store_calendar = load_store_calendar()
+    # Parallelism comes from the pool; keep each forest single-threaded
+    if hasattr(main.model, "n_jobs"):
+        main.model.n_jobs = 1
+
+
+def score_chunk(chunk_id, stores, dates, output_dir):
+    """Score one chunk and write its partition file, returning (chunk_id, rows, seconds)"""
+    started = time.perf_counter()
+    grid = main.build_grid_requests(stores, dates)
+    open_requests = [request for _, _, request in grid if request is not None]
+    predictions = iter(main.make_batch_predictions(main.create_feature_matrix(open_requests)) if open_requests else [])
+
+    def write(f):
+        writer = csv.writer(f)
+        writer.writerow(["Store", "Date", "Predicted_Sales"])
+        for store, date, request in grid:
+            writer.writerow([store, date, float(next(predictions)) if request is not None else 0.0])
+
+    write_atomic(Path(output_dir) / f"{chunk_id}.csv", write)
+    return chunk_id, len(grid), time.perf_counter() - started
+
+
+def run_backfill():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--stores", help="Stores to backfill, e.g. 1-100,205 (default: every store in store.csv)")
+    parser.add_argument("--chunk-stores", type=int, default=50, help="Stores per chunk")
+    parser.add_argument("--chunk-days", type=int, default=7, help="Days per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output-dir", default="backfill_output", help="Directory for partition files and the checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    stores = parse_stores(args.stores) if args.stores else sorted(load_store_metadata())
+    dates = main.date_range(args.start, args.end)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        version = main.model_version(*main.model_artifact_paths())
+    except OSError as e:
+        print(f"Could not read model files: {e}")
+        sys.exit(1)
+
+    config = {
+        "start": args.start,
+        "end": args.end,
+        "stores": args.stores or "all",
+        "chunk_stores": args.chunk_stores,
+        "chunk_days": args.chunk_days,
+        # Partitions scored by another model must not be resumed
+        "model_version": version,
+    }
+    completed = load_checkpoint(output_dir, config, args.restart)
+    chunks = make_chunks(stores, dates, args.chunk_stores, args.chunk_days)
+    remaining = [chunk for chunk in chunks if chunk[0] not in completed]
+
+    print(f"Backfill: {len(stores)} stores x {len(dates)} days in {len(chunks)} chunks "
+          f"({len(chunks) - len(remaining)} already done), {args.workers} workers", flush=True)
+    if not remaining:
+        return
+
+    started = time.perf_counter()
+    rows_done = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(version,)) as pool:
+        futures = [
+            pool.submit(score_chunk, chunk_id, chunk_stores, chunk_dates, str(output_dir))
+            for chunk_id, chunk_stores, chunk_dates in remaining
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            chunk_id, rows, seconds = future.result()
+            completed.add(chunk_id)
+            save_checkpoint(output_dir, config, completed)
+
+            rows_done += rows
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (len(remaining) - done)
+            print(f"[{done}/{len(remaining)}] {chunk_id}: {rows} rows in {seconds:.2f}s "
+                  f"({rows / seconds:,.0f} rows/s) | overall {rows_done / elapsed:,.0f} rows/s, ETA {eta:,.0f}s",
+                  flush=True)
+
+    print(f"Backfill complete: {rows_done} rows in {time.perf_counter() - started:.1f}s -> {output_dir}")
+
+
+if __name__ == "__main__":
+    run_backfill()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark prediction intervals against plain prediction.
+
+Compares, per batch size:
+  - predict:      scaler + model.predict (what /predict/batch pays)
+  - trees:        forecast and per-tree quantiles from a single model.apply call
+  - qrf:          forecast and quantile regression forest quantiles from leaf distributions
+  - legacy loop:  the old per-row, per-tree confidence computation
+
+Usage:
+    python bench_intervals.py               # uses ../rossmann_random_forest_model.pkl
+    python bench_intervals.py --synthetic   # stand-in forest with the notebook's settings
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import main
+from intervals import prediction_quantiles
+
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+def build_synthetic_model():
+    """Fit a forest with the notebook's hyperparameters on random features"""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(20000, len(main.FEATURE_COLUMNS)))
+    y = X[:, main.FEATURE_COLUMNS.index("Sales_rolling_mean_7")] * 1000 + rng.normal(size=len(X)) * 300 + 6000
+    main.scaler = StandardScaler().fit(X)
+    main.model = RandomForestRegressor(
+        n_estimators=100, max_depth=15, min_samples_split=5, min_samples_leaf=2, random_state=42, n_jobs=-1
+    ).fit(main.scaler.transform(X), y)
+
+
+def random_requests(n):
+    start = datetime(2015, 8, 1)
+    return [
+        main.PredictionRequest(
+            store=random.randint(1, 1115),
+            date=(start + timedelta(days=random.randint(0, 47))).strftime("%Y-%m-%d"),
+            promo=random.randint(0, 1),
+            state_holiday="0",
+            school_holiday=random.randint(0, 1),
+            day_of_week=random.randint(1, 7),
+        )
+        for _ in range(n)
+    ]
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def legacy_confidence(features_scaled):
+    for row in features_scaled:
+        row = row.reshape(1, -1)
+        tree_predictions = [tree.predict(row)[0] for tree in main.model.estimators_]
+        1 - (np.std(tree_predictions) / np.mean(tree_predictions))
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="Benchmark a stand-in forest instead of the pickled model")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000], help="Batch sizes to time")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetitions per measurement (best is reported)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        build_synthetic_model()
+    elif not main.load_model_and_scaler():
+        print("Could not load model files; rerun with --synthetic")
+        sys.exit(1)
+
+    random.seed(0)
+    print(f"{'rows':>6} {'predict ms':>11} {'trees ms':>9} {'qrf ms':>8} {'legacy ms':>10} {'trees/predict':>14}")
+    for size in args.sizes:
+        features_scaled = main.scale_features(main.create_feature_matrix(random_requests(size)))
+
+        predict_ms = best_of(lambda: main.model.predict(features_scaled), args.repeats)
+        trees_ms = best_of(lambda: prediction_quantiles(main.model, features_scaled, QUANTILES, "trees"), args.repeats)
+        qrf_ms = best_of(lambda: prediction_quantiles(main.model, features_scaled, QUANTILES, "qrf"), args.repeats)
+        # The legacy loop is O(rows * trees) Python calls; keep it to one pass
+        legacy_ms = best_of(lambda: legacy_confidence(features_scaled[:100]), 1) * size / min(size, 100)
+
+        print(f"{size:>6} {predict_ms:>11.2f} {trees_ms:>9.2f} {qrf_ms:>8.2f} {legacy_ms:>10.1f} {trees_ms / predict_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
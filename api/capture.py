@@ -0,0 +1,147 @@
+"""Opt-in request/response capture to rotating gzip JSONL files"""
+import gzip
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Response bodies larger than this are recorded without their payload
+MAX_RESPONSE_BYTES = 1024 * 1024
+
+
+class TrafficCapture:
+    """Background writer for sampled request/response records.
+
+    Requests hand records to a bounded queue without blocking; a daemon
+    thread serializes them into gzip JSONL files that rotate after
+    rotate_bytes of uncompressed output, keeping the newest max_files.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float = 1.0,
+        rotate_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 20,
+        queue_size: int = 10000,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.rotate_bytes = rotate_bytes
+        self.max_files = max_files
+        self.records_written = 0
+        self.records_dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._file_bytes = 0
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def submit(self, record: dict) -> None:
+        """Queue a record for writing, dropping it if the writer has fallen behind"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.records_dropped += 1
+
+    def close(self) -> None:
+        """Flush queued records and close the current file"""
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _open_file(self):
+        if self._file is not None:
+            self._file.close()
+        name = f"capture-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl.gz"
+        self._file = gzip.open(self.directory / name, "wt", encoding="utf-8")
+        self._file_bytes = 0
+
+        files = sorted(self.directory.glob("capture-*.jsonl.gz"))
+        for old_file in files[:-self.max_files]:
+            old_file.unlink()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                if self._file is None or self._file_bytes >= self.rotate_bytes:
+                    self._open_file()
+                line = json.dumps(record) + "\n"
+                self._file.write(line)
+                self._file_bytes += len(line)
+                self.records_written += 1
+                if self._queue.empty():
+                    self._file.flush()
+            except Exception as e:
+                logger.error(f"Traffic capture write failed: {str(e)}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CaptureMiddleware:
+    """ASGI middleware recording sampled HTTP exchanges into a TrafficCapture"""
+
+    def __init__(self, app, capture: TrafficCapture, model_version: Callable[[], Optional[str]]):
+        self.app = app
+        self.capture = capture
+        self.model_version = model_version
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.capture.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        started = time.perf_counter()
+        request_body = bytearray()
+        response_body = bytearray()
+        response = {"status": None, "truncated": False}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body" and not response["truncated"]:
+                response_body.extend(message.get("body", b""))
+                if len(response_body) > MAX_RESPONSE_BYTES:
+                    response["truncated"] = True
+                    response_body.clear()
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            headers = dict(scope.get("headers") or [])
+            self.capture.submit({
+                "timestamp": datetime.fromtimestamp(arrived).isoformat(),
+                "time": arrived,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+                "body": request_body.decode("utf-8", errors="replace"),
+                "status": response["status"],
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "model_version": self.model_version(),
+                "response": response_body.decode("utf-8", errors="replace") if not response["truncated"] else None,
+            })
@@ -1,18 +1,24 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import pandas as pd
-import joblib
 import numpy as np
 from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
+import math
 import os
 import asyncio
-import uvicorn
 from pathlib import Path
 
+from aggregates import ForecastRollup
+from capture import CaptureMiddleware, TrafficCapture
+from intervals import confidence_scores, prediction_quantiles, quantile_label, tree_predictions
+from monitoring import FeatureMonitor
+from store_data import load_store_metadata, load_store_calendar, load_store_forecasts
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,11 +41,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optional request/response capture for replay testing (enabled by CAPTURE_DIR)
+traffic_capture = None
+if os.getenv("CAPTURE_DIR"):
+    traffic_capture = TrafficCapture(
+        os.getenv("CAPTURE_DIR"),
+        sample_rate=float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0")),
+        rotate_bytes=int(float(os.getenv("CAPTURE_ROTATE_MB", "64")) * 1024 * 1024),
+        max_files=int(os.getenv("CAPTURE_MAX_FILES", "20"))
+    )
+    app.add_middleware(CaptureMiddleware, capture=traffic_capture, model_version=lambda: model_info.get("version"))
+
 # Global variables for model and scaler
 model = None
 scaler = None
 model_info = {}
 
+# Feature order expected by the scaler and model
+FEATURE_COLUMNS = [
+    "Store", "DayOfWeek", "Promo", "StateHoliday_encoded", "SchoolHoliday",
+    "StoreType_encoded", "Assortment_encoded", "CompetitionDistance",
+    "CompetitionOpen", "Year", "Month", "Day", "WeekOfYear", "Quarter",
+    "IsWeekend", "IsMonthEnd", "IsMonthStart", "Month_sin", "Month_cos",
+    "DayOfWeek_sin", "DayOfWeek_cos", "Sales_lag_1", "Sales_lag_7",
+    "Sales_lag_14", "Sales_lag_30", "Sales_rolling_mean_7", "Sales_rolling_std_7",
+    "Sales_rolling_mean_14", "Sales_rolling_std_14", "Sales_rolling_mean_30",
+    "Sales_rolling_std_30"
+]
+
+STATE_HOLIDAY_CODES = {'0': 0, 'a': 1, 'b': 2, 'c': 3}
+
+# Estimated sales history without recent_sales scales with the target day's promo
+FALLBACK_PROMO_MULTIPLIER = 1.2
+SALES_HISTORY_COLUMNS = [column for column in FEATURE_COLUMNS if column.startswith("Sales_")]
+
+# Upper bound on store-days scored by a single what-if scenario
+MAX_SCENARIO_CELLS = 50000
+
+# Streamed batch predictions are scored in chunks of this many rows
+STREAM_CHUNK_SIZE = 250
+MAX_STREAM_PREDICTIONS = 20000
+
+# Input-distribution monitoring, drained off the request path
+feature_monitor = None
+MONITOR_DRAIN_SECONDS = 5
+
+# Store data and forecast rollups
+store_metadata = {}
+store_calendar = {}
+forecast_rollup = None
+
 # Pydantic models
 class PredictionRequest(BaseModel):
     store: int = Field(..., description="Store ID", ge=1)
@@ -84,6 +135,115 @@ class BatchPredictionResponse(BaseModel):
     predictions: List[PredictionResponse]
     total_predictions: int
 
+class StoreForecastUpdate(BaseModel):
+    store: int = Field(..., description="Store ID", ge=1)
+    recent_sales: Optional[List[float]] = Field(None, description="Recent sales data for rolling calculations (last 30 days)")
+    promo: Optional[Dict[str, int]] = Field(None, description="Promotion overrides keyed by date (YYYY-MM-DD -> 0 or 1)")
+
+class ForecastRefreshRequest(BaseModel):
+    updates: List[StoreForecastUpdate]
+
+class ForecastRefreshResponse(BaseModel):
+    stores_refreshed: int
+    predictions_updated: int
+    cells_updated: int
+
+class AggregateCell(BaseModel):
+    group: str
+    period: str
+    forecasted_sales: float
+    store_days: int
+
+class AggregateResponse(BaseModel):
+    group_by: str
+    granularity: str
+    cells: List[AggregateCell]
+    total_cells: int
+
+class ScenarioOverride(BaseModel):
+    stores: List[int] = Field(..., description="Stores the override applies to")
+    start_date: str = Field(..., description="First overridden date in YYYY-MM-DD format")
+    end_date: str = Field(..., description="Last overridden date in YYYY-MM-DD format")
+    promo: Optional[int] = Field(None, description="Promotion (0 or 1)", ge=0, le=1)
+    state_holiday: Optional[str] = Field(None, description="State holiday (0, a, b, c)")
+    school_holiday: Optional[int] = Field(None, description="School holiday (0 or 1)", ge=0, le=1)
+
+class ScenarioRequest(BaseModel):
+    stores: List[int] = Field(..., description="Stores in the base grid")
+    start_date: str = Field(..., description="First date of the base grid in YYYY-MM-DD format")
+    end_date: str = Field(..., description="Last date of the base grid in YYYY-MM-DD format")
+    overrides: List[ScenarioOverride]
+
+class ScenarioCell(BaseModel):
+    store: int
+    date: str
+    base_sales: float
+    scenario_sales: float
+    delta: float
+
+class ScenarioStoreDelta(BaseModel):
+    store: int
+    base_sales: float
+    scenario_sales: float
+    delta: float
+
+class ScenarioDayDelta(BaseModel):
+    date: str
+    base_sales: float
+    scenario_sales: float
+    delta: float
+
+class ScenarioResponse(BaseModel):
+    cells: List[ScenarioCell]
+    stores: List[ScenarioStoreDelta]
+    days: List[ScenarioDayDelta]
+    total_base_sales: float
+    total_scenario_sales: float
+    total_delta: float
+    rows_rescored: int
+
+class IntervalPredictionRequest(BaseModel):
+    predictions: List[PredictionRequest]
+    quantiles: List[float] = Field(default=[0.1, 0.5, 0.9], description="Quantiles to return, each between 0 and 1")
+    method: str = Field(default="trees", description="'trees' (quantiles of per-tree predictions) or 'qrf' (quantile regression forest over leaf distributions)")
+
+class IntervalPrediction(BaseModel):
+    store: int
+    date: str
+    forecasted_sales: float
+    quantiles: Dict[str, float]
+
+class IntervalPredictionResponse(BaseModel):
+    predictions: List[IntervalPrediction]
+    total_predictions: int
+    method: str
+
+class FeatureDrift(BaseModel):
+    feature: str
+    count: int
+    missing: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    quantiles: Dict[str, Optional[float]]
+    histogram: List[int]
+    reference_mean: Optional[float] = None
+    reference_std: Optional[float] = None
+    mean_shift: Optional[float] = None
+    std_ratio: Optional[float] = None
+    drifted: bool
+
+class DriftReport(BaseModel):
+    rows_observed: int
+    rows_dropped: int
+    fallback_rows: int
+    fallback_rate: float
+    histogram_z_edges: List[float]
+    features: List[FeatureDrift]
+    drifted_features: List[str]
+    timestamp: str
+
 class ModelInfo(BaseModel):
     model_config = {"protected_namespaces": ()}  # Add this line
     
@@ -102,43 +262,53 @@ class HealthResponse(BaseModel):
     timestamp: str
 
 # Helper functions
+def model_artifact_paths() -> tuple:
+    """Model and scaler files, located in the parent directory"""
+    parent_dir = Path(__file__).parent.parent
+    return parent_dir / "rossmann_random_forest_model.pkl", parent_dir / "feature_scaler.pkl"
+
+def model_version(model_path: Path, scaler_path: Path) -> str:
+    """Version tied to the artifact files, so caches and backfill checkpoints notice a new model"""
+    artifacts = hashlib.sha1()
+    for path in (model_path, scaler_path):
+        stat = path.stat()
+        artifacts.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"1.0.0+{artifacts.hexdigest()[:8]}"
+
 def load_model_and_scaler():
     """Load the trained model and scaler"""
-    global model, scaler, model_info
+    global model, scaler, model_info, feature_monitor
     
     try:
-        # Get the parent directory (where the model files are located)
-        parent_dir = Path(__file__).parent.parent
-        
-        model_path = parent_dir / "rossmann_random_forest_model.pkl"
-        scaler_path = parent_dir / "feature_scaler.pkl"
+        model_path, scaler_path = model_artifact_paths()
         
         if not model_path.exists():
             raise FileNotFoundError(f"Model file not found: {model_path}")
         if not scaler_path.exists():
             raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
         
+        # joblib (and scikit-learn, through the pickle) is only needed once the model loads
+        import joblib
+        
         model = joblib.load(model_path)
         scaler = joblib.load(scaler_path)
         
         model_info = {
             "model_type": "Random Forest Regressor",
             "trained_on": "Rossmann Store Sales Dataset",
-            "version": "1.0.0",
-            "features": [
-                "Store", "DayOfWeek", "Promo", "StateHoliday_encoded", "SchoolHoliday",
-                "StoreType_encoded", "Assortment_encoded", "CompetitionDistance",
-                "CompetitionOpen", "Year", "Month", "Day", "WeekOfYear", "Quarter",
-                "IsWeekend", "IsMonthEnd", "IsMonthStart", "Month_sin", "Month_cos",
-                "DayOfWeek_sin", "DayOfWeek_cos", "Sales_lag_1", "Sales_lag_7",
-                "Sales_lag_14", "Sales_lag_30", "Sales_rolling_mean_7", "Sales_rolling_std_7",
-                "Sales_rolling_mean_14", "Sales_rolling_std_14", "Sales_rolling_mean_30",
-                "Sales_rolling_std_30"
-            ],
-            "total_features": 31,
+            "version": model_version(model_path, scaler_path),
+            "features": FEATURE_COLUMNS,
+            "total_features": len(FEATURE_COLUMNS),
             "model_requirements": "Requires engineered features including sales history, rolling statistics, and cyclical encodings"
         }
         
+        # Training distribution reference for drift monitoring
+        feature_monitor = FeatureMonitor(
+            FEATURE_COLUMNS,
+            reference_mean=getattr(scaler, "mean_", None),
+            reference_std=getattr(scaler, "scale_", None)
+        )
+        
         logger.info("Model and scaler loaded successfully")
         return True
         
@@ -146,7 +316,20 @@ def load_model_and_scaler():
         logger.error(f"Error loading model: {str(e)}")
         return False
 
-def create_features(data: PredictionRequest) -> pd.DataFrame:
+def uses_sales_fallback(data) -> bool:
+    """Whether sales features must be estimated because fewer than 30 days of history were sent"""
+    recent_sales = getattr(data, 'recent_sales', None)
+    return not (recent_sales and len(recent_sales) >= 30)
+
+def monitor_features(features: np.ndarray, requests: List[Any]):
+    """Queue the feature rows of a request for the drift sketches"""
+    if feature_monitor is not None:
+        feature_monitor.record(
+            features,
+            sum(uses_sales_fallback(data) for data in requests)
+        )
+
+def build_features(data: PredictionRequest) -> Dict[str, Any]:
     """Create features from prediction request with proper feature engineering"""
     try:
         # Parse date
@@ -161,10 +344,10 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
         quarter = (month - 1) // 3 + 1
         
         # Cyclical encodings
-        day_of_week_cos = np.cos(2 * np.pi * day_of_week / 7)
-        day_of_week_sin = np.sin(2 * np.pi * day_of_week / 7)
-        month_cos = np.cos(2 * np.pi * month / 12)
-        month_sin = np.sin(2 * np.pi * month / 12)
+        day_of_week_cos = math.cos(2 * math.pi * day_of_week / 7)
+        day_of_week_sin = math.sin(2 * math.pi * day_of_week / 7)
+        month_cos = math.cos(2 * math.pi * month / 12)
+        month_sin = math.sin(2 * math.pi * month / 12)
         
         # Boolean features
         is_weekend = 1 if day_of_week in [6, 7] else 0
@@ -172,13 +355,7 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
         is_month_start = 1 if day == 1 else 0
         
         # State holiday encoding
-        state_holiday_encoded = 0
-        if data.state_holiday == 'a':
-            state_holiday_encoded = 1
-        elif data.state_holiday == 'b':
-            state_holiday_encoded = 2
-        elif data.state_holiday == 'c':
-            state_holiday_encoded = 3
+        state_holiday_encoded = STATE_HOLIDAY_CODES.get(data.state_holiday, 0)
         
         # Store type and assortment encoding (use defaults if not provided)
         store_type_encoded = 0  # Default
@@ -199,7 +376,7 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
                 competition_open = 1
         
         # Sales-based features (use defaults when historical data not available)
-        if hasattr(data, 'recent_sales') and data.recent_sales and len(data.recent_sales) >= 30:
+        if not uses_sales_fallback(data):
             sales_data = np.array(data.recent_sales[-30:])  # Last 30 days
             
             # Rolling means
@@ -220,18 +397,18 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
         else:
             # Use store and promo-based estimates when no historical data
             base_sales = 5000.0  # Base estimate
-            promo_multiplier = 1.2 if data.promo else 1.0
+            promo_multiplier = FALLBACK_PROMO_MULTIPLIER if data.promo else 1.0
             store_factor = 1.0 + (data.store % 100) / 1000  # Simple store variation
             weekend_factor = 1.1 if is_weekend else 1.0
             
             estimated_sales = base_sales * promo_multiplier * store_factor * weekend_factor
             
             # Add some realistic variation
-            np.random.seed(data.store + day)  # Reproducible randomness
+            rng = np.random.RandomState(data.store + day)  # Reproducible randomness
             
             # Default values based on estimated sales
-            sales_rolling_mean_7 = estimated_sales * (0.9 + np.random.uniform(-0.1, 0.1))
-            sales_rolling_mean_14 = estimated_sales * (0.95 + np.random.uniform(-0.05, 0.05))
+            sales_rolling_mean_7 = estimated_sales * (0.9 + rng.uniform(-0.1, 0.1))
+            sales_rolling_mean_14 = estimated_sales * (0.95 + rng.uniform(-0.05, 0.05))
             sales_rolling_mean_30 = estimated_sales
             
             sales_rolling_std_7 = sales_rolling_mean_7 * 0.15
@@ -239,7 +416,7 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
             sales_rolling_std_30 = sales_rolling_mean_30 * 0.10
             
             sales_lag_7 = sales_rolling_mean_7
-            sales_lag_1 = sales_rolling_mean_7 * (1.0 + np.random.uniform(-0.2, 0.2))          
+            sales_lag_1 = sales_rolling_mean_7 * (1.0 + rng.uniform(-0.2, 0.2))          
             sales_lag_14 = sales_rolling_mean_14
             sales_lag_30 = sales_rolling_mean_30
         
@@ -278,19 +455,27 @@ def create_features(data: PredictionRequest) -> pd.DataFrame:
             'Sales_rolling_std_30': sales_rolling_std_30
         }
         
-        # Create DataFrame
-        df = pd.DataFrame([features])
-        
-        return df
+        return features
         
     except Exception as e:
         logger.error(f"Error creating features: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Feature engineering failed: {str(e)}")
 
-def create_simple_features(data: SimplePredictionRequest) -> pd.DataFrame:
-    """Create features from simplified prediction request with default values"""
-    # Convert to full PredictionRequest with defaults
-    full_request = PredictionRequest(
+def create_features(data: PredictionRequest) -> np.ndarray:
+    """Create a one-row feature matrix for a single prediction request"""
+    return create_feature_matrix([data])
+
+def create_feature_matrix(requests: List[PredictionRequest]) -> np.ndarray:
+    """Create an (n_requests, n_features) matrix in FEATURE_COLUMNS order"""
+    rows = []
+    for data in requests:
+        features = build_features(data)
+        rows.append([features[column] for column in FEATURE_COLUMNS])
+    return np.array(rows, dtype=float).reshape(len(rows), len(FEATURE_COLUMNS))
+
+def simple_to_full_request(data: SimplePredictionRequest) -> PredictionRequest:
+    """Convert a simplified request to a full PredictionRequest with defaults"""
+    return PredictionRequest(
         store=data.store,
         date=data.date,
         promo=data.promo,
@@ -298,32 +483,301 @@ def create_simple_features(data: SimplePredictionRequest) -> pd.DataFrame:
         school_holiday=data.school_holiday,
         day_of_week=data.day_of_week if data.day_of_week else datetime.strptime(data.date, "%Y-%m-%d").isoweekday()
     )
-    return create_features(full_request)
 
-def make_prediction(features_df: pd.DataFrame) -> tuple:
+def create_simple_features(data: SimplePredictionRequest) -> np.ndarray:
+    """Create features from simplified prediction request with default values"""
+    return create_features(simple_to_full_request(data))
+
+def scale_features(features: np.ndarray) -> np.ndarray:
+    """Apply the fitted scaler; a StandardScaler is applied directly in NumPy"""
+    # scikit-learn is already imported once the scaler has been unpickled
+    from sklearn.preprocessing import StandardScaler
+    
+    if isinstance(scaler, StandardScaler):
+        offset = scaler.mean_ if scaler.with_mean else 0.0
+        scale = scaler.scale_ if scaler.with_std else 1.0
+        return (features - offset) / scale
+    return scaler.transform(features)
+
+def forecast_with_confidence(features_scaled: np.ndarray) -> tuple:
+    """Forecasts and confidence scores for scaled rows in a single pass over the forest"""
+    if hasattr(model, 'estimators_'):
+        # For Random Forest, the prediction is the mean of the tree predictions
+        # and confidence comes from their standard deviation
+        per_tree = tree_predictions(model, features_scaled)
+        return per_tree.mean(axis=0), confidence_scores(per_tree)
+    return model.predict(features_scaled), np.full(len(features_scaled), 0.85)  # Default confidence
+
+def make_prediction(features: np.ndarray) -> tuple:
     """Make prediction using the loaded model"""
     try:
-        # Scale features
-        features_scaled = scaler.transform(features_df)
+        forecasts, confidences = forecast_with_confidence(scale_features(features))
+        return float(forecasts[0]), float(confidences[0])
         
-        # Make prediction
-        prediction = model.predict(features_scaled)[0]
-        
-        # Calculate confidence (using prediction interval estimation)
-        # For Random Forest, we can use the standard deviation of tree predictions
-        if hasattr(model, 'estimators_'):
-            tree_predictions = [tree.predict(features_scaled)[0] for tree in model.estimators_]
-            confidence = 1 - (np.std(tree_predictions) / np.mean(tree_predictions))
-            confidence = max(0, min(1, confidence))  # Ensure between 0 and 1
-        else:
-            confidence = 0.85  # Default confidence
+    except Exception as e:
+        logger.error(f"Error making prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+def make_batch_predictions(features: np.ndarray) -> np.ndarray:
+    """Score a multi-row feature matrix with a single scaler/model call"""
+    try:
+        features_scaled = scale_features(features)
+        return model.predict(features_scaled)
         
-        return float(prediction), float(confidence)
+    except Exception as e:
+        logger.error(f"Error making batch prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+def make_batch_predictions_with_confidence(features: np.ndarray) -> tuple:
+    """Score a multi-row feature matrix, returning (forecasts, confidence scores)"""
+    try:
+        return forecast_with_confidence(scale_features(features))
         
     except Exception as e:
-        logger.error(f"Error making prediction: {str(e)}")
+        logger.error(f"Error making batch prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+def load_forecast_data():
+    """Load store metadata, the store calendar and seed the forecast rollups"""
+    global store_metadata, store_calendar, forecast_rollup
+    
+    try:
+        metadata = load_store_metadata()
+        calendar = load_store_calendar()
+        rollup = ForecastRollup(metadata)
+        for store, forecasts in load_store_forecasts().items():
+            # Closed stores do not sell; rescoring applies the same rule
+            closed = {day["date"] for day in calendar.get(store, []) if not day["open"]}
+            rollup.update_store(store, {
+                date: 0.0 if date in closed else sales
+                for date, sales in forecasts.items()
+            })
+        
+        # Publish only once fully seeded, since this may run in a worker thread
+        store_metadata, store_calendar, forecast_rollup = metadata, calendar, rollup
+        
+        logger.info(f"Forecast rollups seeded for {len(rollup.forecasts)} stores")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error loading forecast data: {str(e)}")
+        return False
+
+def rescore_store(update: StoreForecastUpdate) -> Dict[str, float]:
+    """Recompute the part of one store's forecast that an update touches.
+    
+    The update is merged into the store's earlier refresh inputs: the latest
+    recent_sales replace older ones and promo overrides accumulate, and every
+    rescored day uses the merged inputs. Promo overrides rescore only their
+    own dates. New recent_sales change the history features of every day, so
+    they rescore the whole horizon. Days the store is closed stay at 0, as in
+    the seeded forecast.
+    """
+    horizon = forecast_rollup.dates
+    new_overrides = update.promo or {}
+    for date, promo in new_overrides.items():
+        if promo not in (0, 1):
+            raise ValueError(f"Promo override for {date} must be 0 or 1")
+    
+    previous = forecast_rollup.inputs.get(update.store, {})
+    recent_sales = update.recent_sales if update.recent_sales is not None else previous.get("recent_sales")
+    promo_overrides = {**previous.get("promo", {}), **new_overrides}
+    
+    if update.recent_sales is not None:
+        dates = horizon
+    else:
+        dates = [date for date in horizon if date in new_overrides]
+    
+    forecasts = {}
+    requests = []
+    for _, date, grid_request in build_grid_requests([update.store], dates):
+        if grid_request is None:
+            forecasts[date] = 0.0
+            continue
+        requests.append(grid_request.model_copy(update={
+            "promo": promo_overrides.get(date, grid_request.promo),
+            "recent_sales": recent_sales
+        }))
+    
+    if requests:
+        predictions = make_batch_predictions(create_feature_matrix(requests))
+        for request, prediction in zip(requests, predictions):
+            forecasts[request.date] = float(prediction)
+    
+    forecast_rollup.inputs[update.store] = {"recent_sales": recent_sales, "promo": promo_overrides}
+    return forecasts
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """Inclusive list of YYYY-MM-DD dates between two dates"""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+def build_grid_requests(stores: List[int], dates: List[str]) -> List[tuple]:
+    """(store, date, request) for a store x date grid; request is None on closed days.
+    
+    Promo and holidays come from the store calendar when known, store
+    attributes from the store metadata.
+    """
+    grid = []
+    for store in stores:
+        schedule = {day["date"]: day for day in store_calendar.get(store, [])}
+        metadata = store_metadata.get(store, {})
+        for date in dates:
+            day = schedule.get(date)
+            if day is not None and not day["open"]:
+                grid.append((store, date, None))
+                continue
+            grid.append((store, date, PredictionRequest(
+                store=store,
+                date=date,
+                promo=day["promo"] if day else 0,
+                state_holiday=day["state_holiday"] if day else "0",
+                school_holiday=day["school_holiday"] if day else 0,
+                day_of_week=day["day_of_week"] if day else datetime.strptime(date, "%Y-%m-%d").isoweekday(),
+                **metadata
+            )))
+    return grid
+
+def run_scenario(request: ScenarioRequest) -> ScenarioResponse:
+    """Score a base grid and its overridden variant in one model pass.
+    
+    The base feature matrix is built once. Only rows touched by an override
+    are appended as a second block, with the Promo/SchoolHoliday/StateHoliday
+    columns patched in place. Grid rows use the estimated sales history,
+    which build_features scales with the promo flag, so a promo change
+    rescales those columns too and deltas match scoring both variants
+    through /predict/batch.
+    """
+    stores = list(dict.fromkeys(request.stores))
+    dates = date_range(request.start_date, request.end_date)
+    grid_start = datetime.strptime(request.start_date, "%Y-%m-%d")
+    grid_stores = set(stores)
+    grid = [(store, date) for store in stores for date in dates]
+    if len(grid) > MAX_SCENARIO_CELLS:
+        raise ValueError(f"Maximum {MAX_SCENARIO_CELLS} store-days per scenario")
+    
+    base_requests = []
+    row_index = {}
+    for store, date, grid_request in build_grid_requests(stores, dates):
+        if grid_request is not None:
+            row_index[(store, date)] = len(base_requests)
+            base_requests.append(grid_request)
+    
+    # Column patches per overridden row, later overrides winning
+    patches = {}
+    for override in request.overrides:
+        columns = {}
+        if override.promo is not None:
+            columns[FEATURE_COLUMNS.index("Promo")] = override.promo
+        if override.school_holiday is not None:
+            columns[FEATURE_COLUMNS.index("SchoolHoliday")] = override.school_holiday
+        if override.state_holiday is not None:
+            columns[FEATURE_COLUMNS.index("StateHoliday_encoded")] = STATE_HOLIDAY_CODES.get(override.state_holiday, 0)
+        if not columns:
+            continue
+        
+        # Clip the override to the base grid before expanding it
+        override_start = datetime.strptime(override.start_date, "%Y-%m-%d")
+        override_end = datetime.strptime(override.end_date, "%Y-%m-%d")
+        if override_end < override_start:
+            raise ValueError(f"end_date {override.end_date} is before start_date {override.start_date}")
+        first = max((override_start - grid_start).days, 0)
+        last = min((override_end - grid_start).days, len(dates) - 1)
+        for store in override.stores:
+            if store not in grid_stores:
+                continue
+            for date in dates[first:last + 1]:
+                row = row_index.get((store, date))
+                if row is not None:
+                    patches.setdefault(row, {}).update(columns)
+    
+    # One matrix: base rows followed by the patched copies of affected rows only
+    n_base = len(base_requests)
+    affected = np.array(sorted(patches), dtype=int)
+    features = np.empty((n_base + len(affected), len(FEATURE_COLUMNS)))
+    if n_base:
+        features[:n_base] = create_feature_matrix(base_requests)
+    features[n_base:] = features[affected]
+    promo_column = FEATURE_COLUMNS.index("Promo")
+    history_columns = [FEATURE_COLUMNS.index(column) for column in SALES_HISTORY_COLUMNS]
+    for position, row in enumerate(affected):
+        scenario_row = features[n_base + position]
+        new_promo = patches[row].get(promo_column)
+        if new_promo is not None and new_promo != scenario_row[promo_column]:
+            ratio = FALLBACK_PROMO_MULTIPLIER if new_promo else 1.0 / FALLBACK_PROMO_MULTIPLIER
+            scenario_row[history_columns] *= ratio
+        for column, value in patches[row].items():
+            scenario_row[column] = value
+    
+    predictions = np.empty(0)
+    if len(features):
+        predictions = make_batch_predictions(features)
+    base_sales = predictions[:n_base]
+    scenario_sales = base_sales.copy()
+    scenario_sales[affected] = predictions[n_base:]
+    
+    cells = []
+    store_totals = {store: [0.0, 0.0] for store in stores}
+    day_totals = {date: [0.0, 0.0] for date in dates}
+    for store, date in grid:
+        row = row_index.get((store, date))
+        base = float(base_sales[row]) if row is not None else 0.0
+        scenario = float(scenario_sales[row]) if row is not None else 0.0
+        cells.append(ScenarioCell(store=store, date=date, base_sales=base, scenario_sales=scenario, delta=scenario - base))
+        store_totals[store][0] += base
+        store_totals[store][1] += scenario
+        day_totals[date][0] += base
+        day_totals[date][1] += scenario
+    
+    total_base = float(base_sales.sum())
+    total_scenario = float(scenario_sales.sum())
+    return ScenarioResponse(
+        cells=cells,
+        stores=[
+            ScenarioStoreDelta(store=store, base_sales=base, scenario_sales=scenario, delta=scenario - base)
+            for store, (base, scenario) in store_totals.items()
+        ],
+        days=[
+            ScenarioDayDelta(date=date, base_sales=base, scenario_sales=scenario, delta=scenario - base)
+            for date, (base, scenario) in day_totals.items()
+        ],
+        total_base_sales=total_base,
+        total_scenario_sales=total_scenario,
+        total_delta=total_scenario - total_base,
+        rows_rescored=len(affected)
+    )
+
+def stream_simple_predictions(requests: List[SimplePredictionRequest]):
+    """Yield NDJSON prediction lines, scoring STREAM_CHUNK_SIZE rows per model call"""
+    try:
+        for start in range(0, len(requests), STREAM_CHUNK_SIZE):
+            chunk = [simple_to_full_request(data) for data in requests[start:start + STREAM_CHUNK_SIZE]]
+            features = create_feature_matrix(chunk)
+            monitor_features(features, chunk)
+            forecasts, confidences = forecast_with_confidence(scale_features(features))
+            
+            for data, forecast, confidence in zip(chunk, forecasts, confidences):
+                yield PredictionResponse(
+                    store=data.store,
+                    date=data.date,
+                    forecasted_sales=float(forecast),
+                    confidence_score=float(confidence)
+                ).model_dump_json() + "\n"
+                
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error(f"Streaming prediction error: {str(e)}")
+        if isinstance(e, HTTPException):
+            detail = e.detail
+        elif isinstance(e, ValueError):
+            detail = str(e)
+        else:
+            detail = "Internal server error"
+        yield json.dumps({"error": detail}) + "\n"
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -331,6 +785,33 @@ async def startup_event():
     success = load_model_and_scaler()
     if not success:
         logger.error("Failed to load model on startup")
+    
+    # Forecast rollups are only needed by /forecast endpoints; keep them off the
+    # path to the first healthy /health
+    asyncio.get_running_loop().run_in_executor(None, load_forecast_data_on_startup)
+    
+    asyncio.create_task(drain_feature_monitor())
+
+def load_forecast_data_on_startup():
+    if not load_forecast_data():
+        logger.error("Failed to load forecast data on startup")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush captured traffic on shutdown"""
+    if traffic_capture is not None:
+        traffic_capture.close()
+
+async def drain_feature_monitor():
+    """Periodically fold queued feature rows into the drift sketches"""
+    while True:
+        await asyncio.sleep(MONITOR_DRAIN_SECONDS)
+        try:
+            if feature_monitor is not None:
+                # Folding rows into the sketches is NumPy work; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, feature_monitor.drain)
+        except Exception as e:
+            logger.error(f"Feature monitor drain failed: {str(e)}")
 
 # API Routes
 @app.get("/", tags=["Root"])
@@ -367,10 +848,11 @@ async def predict_sales(request: PredictionRequest):
     
     try:
         # Create features
-        features_df = create_features(request)
+        features = create_features(request)
+        monitor_features(features, [request])
         
         # Make prediction
-        prediction, confidence = make_prediction(features_df)
+        prediction, confidence = make_prediction(features)
         
         return PredictionResponse(
             store=request.store,
@@ -393,10 +875,11 @@ async def predict_sales_simple(request: SimplePredictionRequest):
     
     try:
         # Create features
-        features_df = create_simple_features(request)
+        features = create_simple_features(request)
+        monitor_features(features, [request])
         
         # Make prediction
-        prediction, confidence = make_prediction(features_df)
+        prediction, confidence = make_prediction(features)
         
         return PredictionResponse(
             store=request.store,
@@ -420,28 +903,32 @@ async def predict_sales_batch(request: BatchPredictionRequest):
     if len(request.predictions) > 1000:
         raise HTTPException(status_code=400, detail="Maximum 1000 predictions per batch")
     
+    if not request.predictions:
+        return BatchPredictionResponse(predictions=[], total_predictions=0)
+    
     try:
-        predictions = []
+        # One feature matrix and one pass over the forest for the whole batch
+        features = create_feature_matrix(request.predictions)
+        monitor_features(features, request.predictions)
+        forecasts, confidences = make_batch_predictions_with_confidence(features)
         
-        for pred_request in request.predictions:
-            # Create features
-            features_df = create_features(pred_request)
-            
-            # Make prediction
-            prediction, confidence = make_prediction(features_df)
-            
-            predictions.append(PredictionResponse(
+        predictions = [
+            PredictionResponse(
                 store=pred_request.store,
                 date=pred_request.date,
-                forecasted_sales=prediction,
-                confidence_score=confidence
-            ))
+                forecasted_sales=float(forecast),
+                confidence_score=float(confidence)
+            )
+            for pred_request, forecast, confidence in zip(request.predictions, forecasts, confidences)
+        ]
         
         return BatchPredictionResponse(
             predictions=predictions,
             total_predictions=len(predictions)
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -457,34 +944,182 @@ async def predict_sales_batch_simple(request: SimpleBatchPredictionRequest):
     if len(request.predictions) > 1000:
         raise HTTPException(status_code=400, detail="Maximum 1000 predictions per batch")
     
+    if not request.predictions:
+        return BatchPredictionResponse(predictions=[], total_predictions=0)
+    
     try:
-        predictions = []
+        # One feature matrix and one pass over the forest for the whole batch
+        full_requests = [simple_to_full_request(pred_request) for pred_request in request.predictions]
+        features = create_feature_matrix(full_requests)
+        monitor_features(features, full_requests)
+        forecasts, confidences = make_batch_predictions_with_confidence(features)
         
-        for pred_request in request.predictions:
-            # Create features
-            features_df = create_simple_features(pred_request)
-            
-            # Make prediction
-            prediction, confidence = make_prediction(features_df)
-            
-            predictions.append(PredictionResponse(
+        predictions = [
+            PredictionResponse(
                 store=pred_request.store,
                 date=pred_request.date,
-                forecasted_sales=prediction,
-                confidence_score=confidence
-            ))
+                forecasted_sales=float(forecast),
+                confidence_score=float(confidence)
+            )
+            for pred_request, forecast, confidence in zip(request.predictions, forecasts, confidences)
+        ]
         
         return BatchPredictionResponse(
             predictions=predictions,
             total_predictions=len(predictions)
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Batch prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/forecast/aggregate/{group_by}", response_model=AggregateResponse, tags=["Forecast"])
+async def get_forecast_aggregate(
+    group_by: str,
+    granularity: str = "day",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """Get forecast totals for the chain (total), by store_type or by assortment, per day or week"""
+    if forecast_rollup is None:
+        raise HTTPException(status_code=503, detail="Forecast data not loaded")
+    
+    try:
+        cells = forecast_rollup.query(group_by, granularity, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return AggregateResponse(
+        group_by=group_by,
+        granularity=granularity,
+        cells=[AggregateCell(**cell) for cell in cells],
+        total_cells=len(cells)
+    )
+
+@app.post("/forecast/refresh", response_model=ForecastRefreshResponse, tags=["Forecast"])
+async def refresh_forecasts(request: ForecastRefreshRequest):
+    """Rescore the dates each update touches and update the aggregate cells they contribute to"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if forecast_rollup is None:
+        raise HTTPException(status_code=503, detail="Forecast data not loaded")
+    
+    try:
+        predictions_updated = 0
+        cells_updated = 0
+        
+        for update in request.updates:
+            forecasts = rescore_store(update)
+            cells_updated += forecast_rollup.update_store(update.store, forecasts)
+            predictions_updated += len(forecasts)
+        
+        return ForecastRefreshResponse(
+            stores_refreshed=len(request.updates),
+            predictions_updated=predictions_updated,
+            cells_updated=cells_updated
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Forecast refresh error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/predict/scenario", response_model=ScenarioResponse, tags=["Prediction"])
+async def predict_scenario(request: ScenarioRequest):
+    """What-if analysis: compare a base grid with Promo/SchoolHoliday/StateHoliday overrides"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if forecast_rollup is None:
+        raise HTTPException(status_code=503, detail="Forecast data not loaded")
+    
+    try:
+        return run_scenario(request)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Scenario prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/predict/interval", response_model=IntervalPredictionResponse, tags=["Prediction"])
+async def predict_sales_interval(request: IntervalPredictionRequest):
+    """Predict sales with per-row prediction intervals (e.g. p10/p50/p90)"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if len(request.predictions) > 1000:
+        raise HTTPException(status_code=400, detail="Maximum 1000 predictions per batch")
+    
+    if not request.predictions:
+        return IntervalPredictionResponse(predictions=[], total_predictions=0, method=request.method)
+    
+    try:
+        features = create_feature_matrix(request.predictions)
+        monitor_features(features, request.predictions)
+        features_scaled = scale_features(features)
+        forecasts, quantiles = prediction_quantiles(model, features_scaled, request.quantiles, request.method)
+        labels = [quantile_label(q) for q in request.quantiles]
+        
+        predictions = [
+            IntervalPrediction(
+                store=pred_request.store,
+                date=pred_request.date,
+                forecasted_sales=float(forecasts[i]),
+                quantiles={label: float(quantiles[j, i]) for j, label in enumerate(labels)}
+            )
+            for i, pred_request in enumerate(request.predictions)
+        ]
+        
+        return IntervalPredictionResponse(
+            predictions=predictions,
+            total_predictions=len(predictions),
+            method=request.method
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Interval prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/monitoring/drift", response_model=DriftReport, tags=["Monitoring"])
+async def get_drift_report(drift_threshold: float = 0.5):
+    """Compare production feature distributions with the training reference"""
+    if feature_monitor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    report = await asyncio.get_running_loop().run_in_executor(None, feature_monitor.report, drift_threshold)
+    return DriftReport(
+        **report,
+        drifted_features=[feature["feature"] for feature in report["features"] if feature["drifted"]],
+        timestamp=datetime.now().isoformat()
+    )
+
+@app.post("/predict/batch/simple/stream", tags=["Prediction"])
+async def predict_sales_batch_simple_stream(request: SimpleBatchPredictionRequest):
+    """Stream predictions as NDJSON lines so large forecast grids can render progressively"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if len(request.predictions) > MAX_STREAM_PREDICTIONS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_STREAM_PREDICTIONS} predictions per stream")
+    
+    return StreamingResponse(
+        stream_simple_predictions(request.predictions),
+        media_type="application/x-ndjson"
+    )
+
 async def retrain_model_task():
     """Background task to retrain the model"""
     try:
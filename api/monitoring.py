@@ -0,0 +1,156 @@
+"""Streaming input-distribution sketches for drift monitoring"""
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Histogram edges in training standard deviations around the training mean
+Z_EDGES = np.linspace(-4, 4, 17)
+
+REPORTED_QUANTILES = (0.01, 0.5, 0.99)
+
+
+class FeatureMonitor:
+    """Fixed-memory sketches of the feature rows sent to the model.
+
+    Requests only append their feature rows to a queue bounded by row
+    count (O(1)); once it holds more than max_pending_rows the oldest
+    batches are dropped and counted in rows_dropped. drain() folds queued
+    rows into per-feature counts, moments, extremes and a fixed-bin
+    histogram, all kept in units of the training distribution taken from
+    the fitted scaler. record() and drain() may run on different threads.
+    """
+
+    def __init__(
+        self,
+        feature_names: List[str],
+        reference_mean: Optional[np.ndarray] = None,
+        reference_std: Optional[np.ndarray] = None,
+        max_pending_rows: int = 100000,
+    ):
+        n_features = len(feature_names)
+        self.feature_names = list(feature_names)
+        self.has_reference = reference_mean is not None and reference_std is not None
+        self.reference_mean = np.asarray(reference_mean if self.has_reference else np.zeros(n_features), dtype=float)
+        self.reference_std = np.asarray(reference_std if self.has_reference else np.ones(n_features), dtype=float)
+
+        self.max_pending_rows = max_pending_rows
+        self._pending = deque()
+        self._pending_rows = 0
+        self._queue_lock = threading.Lock()
+        # Serializes drains and reports, which update and read the sketches
+        self._sketch_lock = threading.RLock()
+        self.rows_dropped = 0
+
+        self.rows_observed = 0
+        self.fallback_rows = 0
+        self.count = np.zeros(n_features, dtype=np.int64)
+        self.missing = np.zeros(n_features, dtype=np.int64)
+        self.sum_z = np.zeros(n_features)
+        self.sum_z2 = np.zeros(n_features)
+        self.minimum = np.full(n_features, np.inf)
+        self.maximum = np.full(n_features, -np.inf)
+        # One underflow and one overflow bucket around the fixed edges
+        self.histogram = np.zeros((n_features, len(Z_EDGES) + 1), dtype=np.int64)
+
+    def record(self, features: np.ndarray, fallback_rows: int = 0) -> None:
+        """Queue feature rows (1-D or 2-D) for the next drain"""
+        features = np.atleast_2d(features)
+        with self._queue_lock:
+            self._pending.append((features, fallback_rows))
+            self._pending_rows += len(features)
+            while self._pending_rows > self.max_pending_rows:
+                dropped, _ = self._pending.popleft()
+                self._pending_rows -= len(dropped)
+                self.rows_dropped += len(dropped)
+
+    def drain(self) -> int:
+        """Fold all queued rows into the sketches, returning the number of rows processed"""
+        with self._sketch_lock:
+            return self._drain()
+
+    def _drain(self) -> int:
+        with self._queue_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            self._pending_rows = 0
+        if not pending:
+            return 0
+
+        batches = []
+        for features, fallback_rows in pending:
+            batches.append(features)
+            self.fallback_rows += fallback_rows
+
+        X = np.vstack(batches).astype(float)
+        valid = ~np.isnan(X)
+        z = np.where(valid, (X - self.reference_mean) / self.reference_std, 0.0)
+
+        self.rows_observed += len(X)
+        self.count += valid.sum(axis=0)
+        self.missing += (~valid).sum(axis=0)
+        self.sum_z += z.sum(axis=0)
+        self.sum_z2 += (z ** 2).sum(axis=0)
+        self.minimum = np.minimum(self.minimum, np.where(valid, X, np.inf).min(axis=0))
+        self.maximum = np.maximum(self.maximum, np.where(valid, X, -np.inf).max(axis=0))
+
+        n_buckets = self.histogram.shape[1]
+        buckets = np.searchsorted(Z_EDGES, z, side="right") + np.arange(X.shape[1]) * n_buckets
+        self.histogram += np.bincount(buckets[valid], minlength=self.histogram.size).reshape(self.histogram.shape)
+        return len(X)
+
+    def _histogram_quantile(self, feature: int, q: float) -> Optional[float]:
+        counts = self.histogram[feature]
+        total = counts.sum()
+        if total == 0:
+            return None
+        # Bucket boundaries in raw units, clamped to the observed range at the tails
+        edges = np.concatenate((
+            [self.minimum[feature]],
+            Z_EDGES * self.reference_std[feature] + self.reference_mean[feature],
+            [self.maximum[feature]],
+        ))
+        edges = np.clip(edges, self.minimum[feature], self.maximum[feature])
+        cumulative = np.concatenate(([0], np.cumsum(counts)))
+        return float(np.interp(q * total, cumulative, edges))
+
+    def report(self, drift_threshold: float = 0.5) -> Dict[str, Any]:
+        """Compare the observed distributions with the training reference"""
+        with self._sketch_lock:
+            self.drain()
+            return self._report(drift_threshold)
+
+    def _report(self, drift_threshold: float) -> Dict[str, Any]:
+        features = []
+        for i, name in enumerate(self.feature_names):
+            count = int(self.count[i])
+            mean_z = self.sum_z[i] / count if count else 0.0
+            std_z = float(np.sqrt(max(self.sum_z2[i] / count - mean_z ** 2, 0.0))) if count else 0.0
+            compared = self.has_reference and count > 0
+            drifted = compared and (abs(mean_z) > drift_threshold or not 0.5 <= std_z <= 2.0)
+            features.append({
+                "feature": name,
+                "count": count,
+                "missing": int(self.missing[i]),
+                "mean": float(self.reference_mean[i] + mean_z * self.reference_std[i]) if count else None,
+                "std": float(std_z * self.reference_std[i]) if count else None,
+                "min": float(self.minimum[i]) if count else None,
+                "max": float(self.maximum[i]) if count else None,
+                "quantiles": {f"p{q * 100:g}": self._histogram_quantile(i, q) for q in REPORTED_QUANTILES},
+                "histogram": self.histogram[i].tolist(),
+                "reference_mean": float(self.reference_mean[i]) if self.has_reference else None,
+                "reference_std": float(self.reference_std[i]) if self.has_reference else None,
+                "mean_shift": float(mean_z) if compared else None,
+                "std_ratio": std_z if compared else None,
+                "drifted": bool(drifted),
+            })
+
+        return {
+            "rows_observed": self.rows_observed,
+            "rows_dropped": self.rows_dropped,
+            "fallback_rows": self.fallback_rows,
+            "fallback_rate": self.fallback_rows / self.rows_observed if self.rows_observed else 0.0,
+            "histogram_z_edges": Z_EDGES.tolist(),
+            "features": features,
+        }
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Startup profile for the API.
+
+Reports, each in a fresh interpreter:
+  1. the heaviest top-level imports triggered by `import main` (python -X importtime)
+  2. the time spent in each startup phase (import, model load, forecast data)
+  3. the cold-start time from launching uvicorn to the first healthy /health
+
+Usage:
+    python profile_startup.py                 # all sections, 1 s cold-start target
+    python profile_startup.py --target 0.8    # fail (exit 1) above 0.8 s
+    python profile_startup.py --top 25        # show more imports
+"""
+
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+API_DIR = Path(__file__).parent
+
+PHASES_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.load_model_and_scaler()
+model_loaded = time.perf_counter()
+main.load_forecast_data()
+forecast_loaded = time.perf_counter()
+print(json.dumps({
+    "import main": imported - started,
+    "load_model_and_scaler": model_loaded - imported,
+    "load_forecast_data": forecast_loaded - model_loaded,
+}))
+"""
+
+
+def import_times(top):
+    """Cumulative import time of the top-level modules pulled in by main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, int(cumulative) / 1e6, name.strip()))
+
+    # Modules are listed after their own imports, so main's direct children
+    # are the depth-1 lines between the previous top-level line and main's;
+    # this skips what the interpreter imported at startup (encodings, site)
+    main_index = max(i for i, (depth, _, name) in enumerate(entries) if depth == 0 and name == "main")
+    timings = []
+    for depth, seconds, name in reversed(entries[:main_index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            timings.append((seconds, name))
+    timings.sort(reverse=True)
+    return timings[:top], sum(seconds for seconds, _ in timings)
+
+
+def startup_phases():
+    result = subprocess.run([sys.executable, "-c", PHASES_SCRIPT], cwd=API_DIR, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_healthy(timeout):
+    """Seconds from spawning uvicorn until /health reports a loaded model"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if json.load(response).get("model_loaded"):
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.01)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main_profile():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Number of top-level imports to show")
+    parser.add_argument("--target", type=float, default=1.0, help="Cold-start target in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up waiting for /health after this many seconds")
+    args = parser.parse_args()
+
+    timings, total = import_times(args.top)
+    print(f"Top-level imports for `import main` ({total:.3f} s total)")
+    for seconds, name in timings:
+        print(f"  {seconds:8.3f} s  {name}")
+
+    print("\nStartup phases")
+    for phase, seconds in startup_phases().items():
+        print(f"  {seconds:8.3f} s  {phase}")
+
+    healthy = time_to_healthy(args.timeout)
+    print()
+    if healthy is None:
+        print(f"/health did not report a loaded model within {args.timeout:g} s")
+        sys.exit(1)
+    status = "OK" if healthy <= args.target else "OVER TARGET"
+    print(f"Process start to first healthy /health: {healthy:.3f} s (target {args.target:g} s) {status}")
+    sys.exit(0 if healthy <= args.target else 1)
+
+
+if __name__ == "__main__":
+    main_profile()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Replay captured API traffic for performance regression testing.
+
+Captures are written by the API when CAPTURE_DIR is set (see capture.py).
+Requests are re-sent at their original pacing, scaled by --speed, against an
+in-process instance of main.app (or a running server with --url). The
+report compares latency percentiles with the captured ones and diffs every
+response against the recorded output.
+
+Usage:
+    python replay.py captures/                      # original rate, in-process
+    python replay.py captures/ --speed 5            # 5x the original rate
+    python replay.py captures/ --speed 0            # as fast as possible
+    python replay.py captures/*.jsonl.gz --url http://localhost:8000
+"""
+
+import argparse
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Fields that legitimately change between runs
+IGNORED_FIELDS = {"timestamp"}
+
+
+def load_capture(paths):
+    """Read captured records from files or directories, ordered by capture time"""
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("capture-*.jsonl.gz")) if path.is_dir() else [path])
+
+    records = []
+    for file in files:
+        opener = gzip.open if file.suffix == ".gz" else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+            except (EOFError, json.JSONDecodeError):
+                # The file still being written (or left by a killed server) is
+                # flushed but not closed; keep the complete lines read so far
+                pass
+    records.sort(key=lambda record: record["time"])
+    return records
+
+
+def flatten(value, prefix=""):
+    """Flatten JSON into {path: leaf} for field-by-field comparison"""
+    if isinstance(value, dict):
+        items = {}
+        for key, item in value.items():
+            if key not in IGNORED_FIELDS:
+                items.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+        return items
+    if isinstance(value, list):
+        items = {f"{prefix}.length": len(value)}
+        for i, item in enumerate(value):
+            items.update(flatten(item, f"{prefix}[{i}]"))
+        return items
+    return {prefix: value}
+
+
+def diff_responses(expected, actual, rtol):
+    """List of (path, expected, actual) leaves that differ beyond rtol"""
+    try:
+        expected, actual = flatten(json.loads(expected)), flatten(json.loads(actual))
+    except (TypeError, ValueError):
+        return [] if expected == actual else [("", expected, actual)]
+
+    differences = []
+    for path in sorted(set(expected) | set(actual)):
+        old, new = expected.get(path), actual.get(path)
+        if isinstance(old, (int, float)) and isinstance(new, (int, float)) and not isinstance(old, bool):
+            if not np.isclose(old, new, rtol=rtol, atol=0):
+                differences.append((path, old, new))
+        elif old != new:
+            differences.append((path, old, new))
+    return differences
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    return {f"p{q}": float(np.percentile(values, q)) for q in (50, 90, 99)} | {"max": float(max(values))}
+
+
+def make_client(url):
+    """Return (send, close) for a running server or an in-process TestClient with startup run"""
+    if url:
+        import requests
+
+        session = requests.Session()
+
+        def send(method, path, content, headers):
+            return session.request(method, url.rstrip("/") + path, data=content, headers=headers)
+
+        return send, session.close
+
+    from fastapi.testclient import TestClient
+
+    import main
+
+    client = TestClient(main.app)
+    client.__enter__()
+
+    def send(method, path, content, headers):
+        return client.request(method, path, content=content, headers=headers)
+
+    return send, lambda: client.__exit__(None, None, None)
+
+
+def replay(records, send, speed, workers):
+    """Re-send records on their original schedule divided by speed"""
+    results = [None] * len(records)
+    lock = threading.Lock()
+
+    def run(i, record):
+        headers = {"content-type": record["content_type"]} if record.get("content_type") else {}
+        path = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+        started = time.perf_counter()
+        try:
+            response = send(record["method"], path, content=record["body"].encode("utf-8"), headers=headers)
+            result = (response.status_code, response.text)
+        except Exception as e:
+            # Connection errors and timeouts are reported, not raised
+            result = (None, f"{type(e).__name__}: {e}")
+        latency_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            results[i] = result + (latency_ms,)
+
+    first_time = records[0]["time"]
+    replay_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, record in enumerate(records):
+            if speed > 0:
+                delay = (record["time"] - first_time) / speed - (time.perf_counter() - replay_start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, i, record)
+    return results, time.perf_counter() - replay_start
+
+
+def main_replay():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="Capture files or directories")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay rate multiplier (0 = no pacing)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--url", help="Replay against a running server instead of an in-process instance")
+    parser.add_argument("--rtol", type=float, default=1e-6, help="Relative tolerance for numeric output diffs")
+    parser.add_argument("--show-diffs", type=int, default=5, help="Number of differing requests to print")
+    args = parser.parse_args()
+
+    records = load_capture(args.captures)
+    if not records:
+        print("No captured requests found")
+        return
+
+    send, close = make_client(args.url)
+    try:
+        results, elapsed = replay(records, send, args.speed, args.workers)
+    finally:
+        close()
+
+    failures = []
+    status_mismatches = 0
+    differing = []
+    for record, (status, text, _) in zip(records, results):
+        if status is None:
+            failures.append((record, text))
+        elif status != record["status"]:
+            status_mismatches += 1
+        elif record.get("response") is not None:
+            differences = diff_responses(record["response"], text, args.rtol)
+            if differences:
+                differing.append((record, differences))
+
+    captured_span = records[-1]["time"] - records[0]["time"]
+    versions = sorted({str(record.get("model_version")) for record in records})
+    print(f"Replayed {len(records)} requests in {elapsed:.2f}s (captured span {captured_span:.2f}s, speed {args.speed:g}x)")
+    print(f"Captured model versions: {', '.join(versions)}")
+    print(f"{'latency ms':<12} {'captured':>10} {'replayed':>10}")
+    captured = percentiles([record["latency_ms"] for record in records])
+    replayed = percentiles([latency for status, _, latency in results if status is not None])
+    for key in replayed:
+        print(f"{key:<12} {captured.get(key, float('nan')):>10.2f} {replayed[key]:>10.2f}")
+
+    print(f"Failed requests: {len(failures)}")
+    for record, error in failures[:args.show_diffs]:
+        print(f"  {record['method']} {record['path']} at {record['timestamp']}: {error}")
+    print(f"Status mismatches: {status_mismatches}")
+    print(f"Responses with output diffs: {len(differing)}")
+    for record, differences in differing[:args.show_diffs]:
+        print(f"  {record['method']} {record['path']} at {record['timestamp']}:")
+        for path, old, new in differences[:5]:
+            print(f"    {path}: {old!r} -> {new!r}")
+
+
+if __name__ == "__main__":
+    main_replay()
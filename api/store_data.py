@@ -0,0 +1,65 @@
+"""Loaders for the store metadata, calendar and forecast CSVs shipped with the model"""
+import csv
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# The CSVs live next to the model files in the parent directory
+DATA_DIR = Path(__file__).parent.parent
+
+STORE_METADATA_FILE = "store.csv"
+STORE_CALENDAR_FILE = "test.csv"
+STORE_FORECAST_FILE = "rossmann_6week_forecast.csv"
+
+
+def _optional_float(value: str) -> Optional[float]:
+    return float(value) if value not in ("", None) else None
+
+
+def _optional_int(value: str) -> Optional[int]:
+    return int(float(value)) if value not in ("", None) else None
+
+
+def load_store_metadata(path: Optional[Path] = None) -> Dict[int, Dict[str, Any]]:
+    """Load static store attributes keyed by store ID"""
+    path = path or DATA_DIR / STORE_METADATA_FILE
+    metadata = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            metadata[int(row["Store"])] = {
+                "store_type": row["StoreType"] or None,
+                "assortment": row["Assortment"] or None,
+                "competition_distance": _optional_float(row["CompetitionDistance"]),
+                "competition_open_since_month": _optional_int(row["CompetitionOpenSinceMonth"]),
+                "competition_open_since_year": _optional_int(row["CompetitionOpenSinceYear"]),
+            }
+    return metadata
+
+
+def load_store_calendar(path: Optional[Path] = None) -> Dict[int, List[Dict[str, Any]]]:
+    """Load the per-store daily schedule (open, promo, holidays) sorted by date"""
+    path = path or DATA_DIR / STORE_CALENDAR_FILE
+    calendar = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            calendar.setdefault(int(row["Store"]), []).append({
+                "date": row["Date"],
+                "day_of_week": int(row["DayOfWeek"]),
+                # A handful of rows have no Open flag; treat them as trading days
+                "open": row["Open"] != "0",
+                "promo": int(row["Promo"]),
+                "state_holiday": row["StateHoliday"] or "0",
+                "school_holiday": int(row["SchoolHoliday"]),
+            })
+    for days in calendar.values():
+        days.sort(key=lambda day: day["date"])
+    return calendar
+
+
+def load_store_forecasts(path: Optional[Path] = None) -> Dict[int, Dict[str, float]]:
+    """Load the exported store-level forecasts as {store: {date: sales}}"""
+    path = path or DATA_DIR / STORE_FORECAST_FILE
+    forecasts = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            forecasts.setdefault(int(row["Store"]), {})[row["Date"]] = float(row["Predicted_Sales"])
+    return forecasts
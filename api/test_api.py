@@ -68,6 +68,145 @@ def test_batch_prediction():
     print(f"Response: {response.json()}")
     print("-" * 50)
 
+def test_stream_prediction():
+    """Test streaming batch prediction endpoint"""
+    print("Testing streaming batch prediction...")
+    
+    base_date = datetime(2023, 12, 15)
+    predictions = [
+        {
+            "store": store,
+            "date": (base_date + timedelta(days=day)).strftime("%Y-%m-%d"),
+            "promo": day % 2
+        }
+        for store in range(1, 51)
+        for day in range(7)
+    ]
+    
+    response = requests.post(f"{BASE_URL}/predict/batch/simple/stream", json={"predictions": predictions}, stream=True)
+    print(f"Status: {response.status_code}")
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    print(f"Streamed predictions: {len(lines)} of {len(predictions)}")
+    print(f"First prediction: {lines[0] if lines else None}")
+    print("-" * 50)
+
+def test_interval_prediction():
+    """Test prediction interval endpoint"""
+    print("Testing interval prediction...")
+    
+    prediction = {
+        "store": 1,
+        "date": "2023-12-15",
+        "promo": 1,
+        "state_holiday": "0",
+        "school_holiday": 0,
+        "day_of_week": 5
+    }
+    
+    for method in ["trees", "qrf"]:
+        test_data = {"predictions": [prediction], "quantiles": [0.1, 0.5, 0.9], "method": method}
+        response = requests.post(f"{BASE_URL}/predict/interval", json=test_data)
+        print(f"{method} status: {response.status_code}")
+        print(f"{method} response: {response.json()}")
+    print("-" * 50)
+
+def test_qrf_negative_leaf_impurity():
+    """Test that qrf quantiles stay finite when a leaf's impurity rounds below zero"""
+    print("Testing qrf intervals with a negative leaf impurity...")
+    from types import SimpleNamespace
+    
+    import numpy as np
+    
+    from intervals import prediction_quantiles
+    
+    # Every row lands in leaf 0, whose variance came out as -7.45e-09
+    tree = SimpleNamespace(
+        value=np.array([[[5000.0]], [[6000.0]]]),
+        impurity=np.array([-7.45e-09, 250000.0])
+    )
+    model = SimpleNamespace(
+        estimators_=[SimpleNamespace(tree_=tree)] * 3,
+        apply=lambda X: np.zeros((len(X), 3), dtype=int),
+        criterion="squared_error"
+    )
+    forecasts, quantiles = prediction_quantiles(model, np.zeros((2, 31)), [0.1, 0.5, 0.9], "qrf")
+    print(f"Forecasts: {forecasts}, quantiles: {quantiles[:, 0]}")
+    assert np.isfinite(quantiles).all(), "negative leaf impurity produced NaN quantiles"
+    print("-" * 50)
+
+def test_forecast_aggregates():
+    """Test forecast aggregate and refresh endpoints"""
+    print("Testing forecast aggregates...")
+    
+    for group_by in ["total", "store_type", "assortment"]:
+        response = requests.get(f"{BASE_URL}/forecast/aggregate/{group_by}", params={"granularity": "week"})
+        print(f"{group_by} status: {response.status_code}")
+        print(f"{group_by} cells: {response.json().get('total_cells')}")
+    
+    test_data = {"updates": [{"store": 1, "promo": {"2015-08-03": 1}}]}
+    response = requests.post(f"{BASE_URL}/forecast/refresh", json=test_data)
+    print(f"Refresh status: {response.status_code}")
+    print(f"Refresh response: {response.json()}")
+    print("-" * 50)
+
+def test_forecast_refresh_builds_on_history():
+    """Test that a promo refresh keeps the history sent by an earlier refresh"""
+    print("Testing chained forecast refreshes...")
+    
+    def day_total(date):
+        response = requests.get(
+            f"{BASE_URL}/forecast/aggregate/total",
+            params={"start_date": date, "end_date": date}
+        )
+        return response.json()["cells"][0]["forecasted_sales"]
+    
+    history = {"updates": [{"store": 1, "recent_sales": [20000.0] * 30}]}
+    response = requests.post(f"{BASE_URL}/forecast/refresh", json=history)
+    print(f"History refresh status: {response.status_code}")
+    after_history = day_total("2015-08-04")
+    
+    # Store 1 already runs a promo on 2015-08-04, so this override changes nothing
+    no_op = {"updates": [{"store": 1, "promo": {"2015-08-04": 1}}]}
+    response = requests.post(f"{BASE_URL}/forecast/refresh", json=no_op)
+    print(f"Promo refresh status: {response.status_code}")
+    after_promo = day_total("2015-08-04")
+    
+    print(f"2015-08-04 total: {after_history} -> {after_promo}")
+    assert abs(after_promo - after_history) < 1e-6, "promo refresh discarded the earlier recent_sales"
+    print("-" * 50)
+
+def test_scenario_prediction():
+    """Test what-if scenario endpoint"""
+    print("Testing scenario prediction...")
+    
+    test_data = {
+        "stores": [1, 3, 7],
+        "start_date": "2015-09-07",
+        "end_date": "2015-09-13",
+        "overrides": [
+            {"stores": [1, 3], "start_date": "2015-09-10", "end_date": "2015-09-12", "promo": 1}
+        ]
+    }
+    
+    response = requests.post(f"{BASE_URL}/predict/scenario", json=test_data)
+    print(f"Status: {response.status_code}")
+    data = response.json()
+    print(f"Rows rescored: {data.get('rows_rescored')}")
+    print(f"Total delta: {data.get('total_delta')}")
+    print(f"Per-store deltas: {data.get('stores')}")
+    print("-" * 50)
+
+def test_drift_report():
+    """Test input drift monitoring endpoint"""
+    print("Testing drift report...")
+    response = requests.get(f"{BASE_URL}/monitoring/drift")
+    print(f"Status: {response.status_code}")
+    data = response.json()
+    print(f"Rows observed: {data.get('rows_observed')}")
+    print(f"Fallback rate: {data.get('fallback_rate')}")
+    print(f"Drifted features: {data.get('drifted_features')}")
+    print("-" * 50)
+
 def test_retrain():
     """Test retrain endpoint"""
     print("Testing retrain endpoint...")
@@ -96,6 +235,13 @@ if __name__ == "__main__":
         test_model_info()
         test_single_prediction()
         test_batch_prediction()
+        test_stream_prediction()
+        test_interval_prediction()
+        test_qrf_negative_leaf_impurity()
+        test_forecast_aggregates()
+        test_forecast_refresh_builds_on_history()
+        test_scenario_prediction()
+        test_drift_report()
         test_retrain()
         test_swagger_docs()
         
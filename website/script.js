@@ -15,6 +15,22 @@ const FINAL_API_URL = window.location.hostname === 'localhost' || window.locatio
 let batchPredictionCount = 0;
 let currentBatchResults = [];
 
+// Prediction cache and request batching
+const PREDICTION_CACHE_KEY = 'rossmannPredictionCache';
+const BATCH_FLUSH_DELAY_MS = 20;
+const MAX_BATCH_SIZE = 1000; // /predict/batch/simple limit
+const MAX_GRID_PREDICTIONS = 20000; // /predict/batch/simple/stream limit
+// Room for a full grid, so repeat views of the largest grid stay cached
+const MAX_CACHE_ENTRIES = MAX_GRID_PREDICTIONS;
+// Serializing the cache is main-thread work, so writes are batched
+const CACHE_SAVE_DELAY_MS = 2000;
+
+let modelVersion = null;
+let predictionCache = new Map();
+const pendingPredictions = new Map();
+let batchFlushTimer = null;
+let cacheSaveTimer = null;
+
 // DOM elements
 const elements = {
     apiStatus: document.getElementById('apiStatus'),
@@ -28,6 +44,9 @@ const elements = {
     submitBatchBtn: document.getElementById('submitBatch'),
     batchResults: document.getElementById('batchResults'),
     modelInfo: document.getElementById('modelInfo'),
+    gridForm: document.getElementById('gridForm'),
+    gridResults: document.getElementById('gridResults'),
+    gridProgress: document.getElementById('gridProgress'),
     loadingOverlay: document.getElementById('loadingOverlay'),
     errorModal: document.getElementById('errorModal'),
     errorMessage: document.getElementById('errorMessage')
@@ -38,6 +57,13 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
 });
 
+// Persist a prediction cache write still waiting on its timer
+window.addEventListener('pagehide', function() {
+    if (cacheSaveTimer) {
+        savePredictionCache();
+    }
+});
+
 async function initializeApp() {
     await checkApiHealth();
     await loadModelInfo();
@@ -77,6 +103,7 @@ async function loadModelInfo() {
         }
         
         const data = await response.json();
+        setModelVersion(data.version);
         displayModelInfo(data);
     } catch (error) {
         elements.modelInfo.innerHTML = '<div class="error">Failed to load model information</div>';
@@ -84,6 +111,250 @@ async function loadModelInfo() {
     }
 }
 
+// Prediction Cache
+function setModelVersion(version) {
+    // Cached predictions are only valid for the model version that produced them
+    modelVersion = version;
+    try {
+        const stored = JSON.parse(localStorage.getItem(PREDICTION_CACHE_KEY));
+        predictionCache = stored && stored.modelVersion === modelVersion ? new Map(stored.entries) : new Map();
+    } catch (error) {
+        predictionCache = new Map();
+    }
+}
+
+function predictionKey(request) {
+    return [
+        modelVersion,
+        request.store,
+        request.date,
+        request.promo,
+        request.state_holiday || '0',
+        request.school_holiday || 0,
+        request.day_of_week || ''
+    ].join('|');
+}
+
+function cachePrediction(key, prediction) {
+    // Re-insert so Map order tracks recency for eviction
+    predictionCache.delete(key);
+    predictionCache.set(key, prediction);
+    if (predictionCache.size > MAX_CACHE_ENTRIES) {
+        predictionCache.delete(predictionCache.keys().next().value);
+    }
+}
+
+function scheduleCacheSave() {
+    if (!cacheSaveTimer) {
+        cacheSaveTimer = setTimeout(savePredictionCache, CACHE_SAVE_DELAY_MS);
+    }
+}
+
+function savePredictionCache() {
+    clearTimeout(cacheSaveTimer);
+    cacheSaveTimer = null;
+    const entries = Array.from(predictionCache.entries());
+    try {
+        localStorage.setItem(PREDICTION_CACHE_KEY, JSON.stringify({ modelVersion, entries }));
+    } catch (error) {
+        console.warn('Could not persist prediction cache:', error);
+    }
+}
+
+// Request Batching
+function requestPrediction(request) {
+    const key = predictionKey(request);
+    if (predictionCache.has(key)) {
+        return Promise.resolve(predictionCache.get(key));
+    }
+    
+    // Identical requests waiting for the same flush share one promise
+    let pending = pendingPredictions.get(key);
+    if (!pending) {
+        pending = { request };
+        pending.promise = new Promise((resolve, reject) => {
+            pending.resolve = resolve;
+            pending.reject = reject;
+        });
+        pendingPredictions.set(key, pending);
+        
+        if (pendingPredictions.size >= MAX_BATCH_SIZE) {
+            flushPredictions();
+        } else if (!batchFlushTimer) {
+            batchFlushTimer = setTimeout(flushPredictions, BATCH_FLUSH_DELAY_MS);
+        }
+    }
+    return pending.promise;
+}
+
+async function flushPredictions() {
+    clearTimeout(batchFlushTimer);
+    batchFlushTimer = null;
+    
+    const batch = Array.from(pendingPredictions.entries());
+    pendingPredictions.clear();
+    if (batch.length === 0) {
+        return;
+    }
+    
+    try {
+        const response = await fetch(`${FINAL_API_URL}/predict/batch/simple`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ predictions: batch.map(([, pending]) => pending.request) })
+        });
+        
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.detail || 'Prediction failed');
+        }
+        
+        const result = await response.json();
+        result.predictions.forEach((prediction, i) => {
+            const [key, pending] = batch[i];
+            cachePrediction(key, prediction);
+            pending.resolve(prediction);
+        });
+        scheduleCacheSave();
+        
+    } catch (error) {
+        batch.forEach(([, pending]) => pending.reject(error));
+    }
+}
+
+// Streaming Predictions
+async function streamPredictions(requests, onPrediction) {
+    // Serve cached rows immediately and only stream the rest
+    const missing = [];
+    requests.forEach((request, index) => {
+        const key = predictionKey(request);
+        if (predictionCache.has(key)) {
+            onPrediction(predictionCache.get(key), index);
+        } else {
+            missing.push({ request, index, key });
+        }
+    });
+    
+    if (missing.length === 0) {
+        return;
+    }
+    
+    const response = await fetch(`${FINAL_API_URL}/predict/batch/simple/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ predictions: missing.map(item => item.request) })
+    });
+    
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || 'Prediction failed');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let received = 0;
+    
+    try {
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) {
+                    continue;
+                }
+                const prediction = JSON.parse(line);
+                if (prediction.error) {
+                    throw new Error(prediction.error);
+                }
+                const item = missing[received++];
+                cachePrediction(item.key, prediction);
+                onPrediction(prediction, item.index);
+            }
+        }
+        
+        if (received < missing.length) {
+            throw new Error(`Prediction stream ended after ${received} of ${missing.length} rows`);
+        }
+    } finally {
+        scheduleCacheSave();
+    }
+}
+
+// Progressive Results Table
+function createProgressiveTable(container, total, onProgress) {
+    container.innerHTML = `
+        <table>
+            <thead>
+                <tr>
+                    <th>Store</th>
+                    <th>Date</th>
+                    <th>Forecasted Sales</th>
+                    <th>Confidence</th>
+                </tr>
+            </thead>
+            <tbody></tbody>
+        </table>
+    `;
+    
+    // Placeholder rows keep results in request order while they stream in
+    const tbody = container.querySelector('tbody');
+    const rows = [];
+    const fragment = document.createDocumentFragment();
+    for (let i = 0; i < total; i++) {
+        const row = document.createElement('tr');
+        row.innerHTML = '<td colspan="4">Loading...</td>';
+        rows.push(row);
+        fragment.appendChild(row);
+    }
+    tbody.appendChild(fragment);
+    
+    // Apply updates at most once per animation frame
+    let queued = [];
+    let frameRequested = false;
+    let completed = 0;
+    
+    function render() {
+        frameRequested = false;
+        for (const [prediction, index] of queued) {
+            rows[index].innerHTML = formatPredictionRow(prediction);
+        }
+        completed += queued.length;
+        queued = [];
+        if (onProgress) {
+            onProgress(completed, total);
+        }
+    }
+    
+    return function update(prediction, index) {
+        queued.push([prediction, index]);
+        if (!frameRequested) {
+            frameRequested = true;
+            requestAnimationFrame(render);
+        }
+    };
+}
+
+function formatPredictionRow(pred) {
+    return `
+        <td>${pred.store}</td>
+        <td>${pred.date}</td>
+        <td>$${pred.forecasted_sales.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2})}</td>
+        <td>${pred.confidence_score ? `${(pred.confidence_score * 100).toFixed(1)}%` : 'N/A'}</td>
+    `;
+}
+
 function displayModelInfo(info) {
     const featuresHtml = info.features.map(feature => 
         `<span class="feature-tag">${feature}</span>`
@@ -131,6 +402,9 @@ function setupEventListeners() {
     
     // Download results
     document.getElementById('downloadResults').addEventListener('click', downloadResults);
+    
+    // Forecast grid
+    elements.gridForm.addEventListener('submit', handleGridForecast);
 }
 
 function setDefaultDate() {
@@ -140,6 +414,7 @@ function setDefaultDate() {
     
     const dateInput = document.getElementById('date');
     dateInput.value = tomorrow.toISOString().split('T')[0];
+    document.getElementById('gridStartDate').value = tomorrow.toISOString().split('T')[0];
 }
 
 // Single Prediction Handler
@@ -156,24 +431,15 @@ async function handleSinglePrediction(event) {
     
     if (data.day_of_week) {
         data.day_of_week = parseInt(data.day_of_week);
+    } else {
+        delete data.day_of_week; // Auto-calculated by the API
     }
-      showLoading(true);
+    
+    showLoading(true);
     
     try {
-        const response = await fetch(`${FINAL_API_URL}/predict/simple`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(data)
-        });
-        
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.detail || 'Prediction failed');
-        }
-        
-        const result = await response.json();
+        // Cached, or merged with any other predictions requested in the same tick
+        const result = await requestPrediction(data);
         displaySingleResult(result);
         
     } catch (error) {
@@ -311,6 +577,8 @@ async function handleBatchPrediction() {
         
         if (data.day_of_week) {
             data.day_of_week = parseInt(data.day_of_week);
+        } else {
+            delete data.day_of_week; // Auto-calculated by the API
         }
         
         predictions.push(data);
@@ -320,61 +588,25 @@ async function handleBatchPrediction() {
         showError('Please add at least one prediction');
         return;
     }
-      showLoading(true);
+    
+    currentBatchResults = new Array(predictions.length);
+    document.getElementById('totalPredictions').textContent = predictions.length;
+    const updateRow = createProgressiveTable(document.getElementById('batchResultsTable'), predictions.length);
+    showBatchResults();
     
     try {
-        const response = await fetch(`${FINAL_API_URL}/predict/batch/simple`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ predictions })
+        await streamPredictions(predictions, (prediction, index) => {
+            currentBatchResults[index] = prediction;
+            updateRow(prediction, index);
         });
-        
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.detail || 'Batch prediction failed');
-        }
-        
-        const result = await response.json();
-        displayBatchResults(result);
-        
     } catch (error) {
         showError(`Batch prediction failed: ${error.message}`);
     } finally {
-        showLoading(false);
+        currentBatchResults = currentBatchResults.filter(Boolean);
     }
 }
 
-function displayBatchResults(result) {
-    currentBatchResults = result.predictions;
-    
-    document.getElementById('totalPredictions').textContent = result.total_predictions;
-    
-    const tableHtml = `
-        <table>
-            <thead>
-                <tr>
-                    <th>Store</th>
-                    <th>Date</th>
-                    <th>Forecasted Sales</th>
-                    <th>Confidence</th>
-                </tr>
-            </thead>
-            <tbody>
-                ${result.predictions.map(pred => `
-                    <tr>
-                        <td>${pred.store}</td>
-                        <td>${pred.date}</td>
-                        <td>$${pred.forecasted_sales.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2})}</td>
-                        <td>${pred.confidence_score ? `${(pred.confidence_score * 100).toFixed(1)}%` : 'N/A'}</td>
-                    </tr>
-                `).join('')}
-            </tbody>
-        </table>
-    `;
-    
-    document.getElementById('batchResultsTable').innerHTML = tableHtml;
+function showBatchResults() {
     elements.batchResults.style.display = 'block';
     elements.batchResults.classList.add('success-animation');
     
@@ -384,6 +616,59 @@ function displayBatchResults(result) {
     }, 500);
 }
 
+// Forecast Grid Handler
+async function handleGridForecast(event) {
+    event.preventDefault();
+    
+    const formData = new FormData(event.target);
+    const storeFrom = parseInt(formData.get('store_from'));
+    const storeTo = parseInt(formData.get('store_to'));
+    const days = parseInt(formData.get('days'));
+    const promo = parseInt(formData.get('promo'));
+    const startDate = new Date(formData.get('start_date'));
+    
+    if (storeTo < storeFrom) {
+        showError('Last store must not be lower than first store');
+        return;
+    }
+    
+    const requests = [];
+    for (let store = storeFrom; store <= storeTo; store++) {
+        for (let day = 0; day < days; day++) {
+            const date = new Date(startDate);
+            date.setUTCDate(date.getUTCDate() + day);
+            requests.push({
+                store,
+                date: date.toISOString().split('T')[0],
+                promo,
+                state_holiday: '0',
+                school_holiday: 0
+            });
+        }
+    }
+    
+    if (requests.length > MAX_GRID_PREDICTIONS) {
+        showError(`Forecast grid is limited to ${MAX_GRID_PREDICTIONS.toLocaleString('en-US')} store-days`);
+        return;
+    }
+    
+    elements.gridResults.style.display = 'block';
+    const updateRow = createProgressiveTable(
+        document.getElementById('gridResultsTable'),
+        requests.length,
+        (completed, total) => {
+            elements.gridProgress.textContent = `${completed.toLocaleString('en-US')} / ${total.toLocaleString('en-US')}`;
+        }
+    );
+    elements.gridProgress.textContent = `0 / ${requests.length.toLocaleString('en-US')}`;
+    
+    try {
+        await streamPredictions(requests, updateRow);
+    } catch (error) {
+        showError(`Forecast grid failed: ${error.message}`);
+    }
+}
+
 // Utility Functions
 function showLoading(show) {
     elements.loadingOverlay.style.display = show ? 'flex' : 'none';